@@ -18,12 +18,15 @@ Copyright: myOS Project
 """
 
 import argparse
+import hashlib
 import os
 import shutil
+import socket
 import subprocess
 import sys
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 from enum import Enum
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional, List
 
@@ -40,6 +43,10 @@ class Config:
     SOURCE_DIR = "myOS"
     OUTPUT_DIR = "bin"
     TOOLCHAIN_DIR = "cmake/toolchains"
+    COMPILER_CACHE_DIR = ".ccache"
+    
+    # Fingerprint of the last successful configure (inside BUILD_DIR)
+    CONFIGURE_STAMP = ".configure_stamp"
     
     # Default toolchain
     DEFAULT_TOOLCHAIN = "native-gcc-12-m32.cmake"
@@ -47,48 +54,61 @@ class Config:
     # Build targets
     DEFAULT_TARGET = "myOS"
     
+    # Preferred CMake generator (used when available)
+    DEFAULT_GENERATOR = "Ninja"
+    
+    # Compiler caches, in order of preference
+    COMPILER_CACHES = ["ccache", "sccache"]
+    
     # QEMU settings
     QEMU_CMD = "qemu-system-i386"
     QEMU_ARGS = ["-cdrom", "bin/myOS.iso", "-serial", "stdio"]
+    QEMU_CDROM_DEVICE = "ide1-cd0"
+    QEMU_MONITOR_SOCKET = ".qemu-monitor.sock"  # in the project root, survives --clean
+    QEMU_MONITOR_TIMEOUT = 5.0
+
 
 
 # =============================================================================
 # TERMINAL COLORS
 # =============================================================================
 
+@dataclass(frozen=True)
 class Colors:
     """ANSI color codes for terminal output."""
     
-    RESET = "\033[0m"
-    BOLD = "\033[1m"
+    RESET: str = "\033[0m"
+    BOLD: str = "\033[1m"
     
     # Regular colors
-    RED = "\033[31m"
-    GREEN = "\033[32m"
-    YELLOW = "\033[33m"
-    BLUE = "\033[34m"
-    MAGENTA = "\033[35m"
-    CYAN = "\033[36m"
-    WHITE = "\033[37m"
+    RED: str = "\033[31m"
+    GREEN: str = "\033[32m"
+    YELLOW: str = "\033[33m"
+    BLUE: str = "\033[34m"
+    MAGENTA: str = "\033[35m"
+    CYAN: str = "\033[36m"
+    WHITE: str = "\033[37m"
     
     # Bold colors
-    BRED = "\033[1;31m"
-    BGREEN = "\033[1;32m"
-    BYELLOW = "\033[1;33m"
-    BBLUE = "\033[1;34m"
-    BCYAN = "\033[1;36m"
-    
-    @classmethod
-    def disable(cls):
-        """Disable colors (for non-TTY output)."""
-        for attr in dir(cls):
-            if not attr.startswith('_') and isinstance(getattr(cls, attr), str):
-                setattr(cls, attr, "")
+    BRED: str = "\033[1;31m"
+    BGREEN: str = "\033[1;32m"
+    BYELLOW: str = "\033[1;33m"
+    BBLUE: str = "\033[1;34m"
+    BCYAN: str = "\033[1;36m"
+    
+    def disable(self) -> "Colors":
+        """Return a palette with all colors disabled (for non-TTY output)."""
+        return Colors(*[""] * len(fields(self)))
 
 
-# Check if colors should be disabled
-if not sys.stdout.isatty():
-    Colors.disable()
+_COLORS_ON = Colors()
+_COLORS_OFF = _COLORS_ON.disable()
+
+# Colors only on a terminal, and never when NO_COLOR is set (no-color.org)
+COLOR = sys.stdout.isatty() and not os.environ.get("NO_COLOR")
+
+# Active palette
+C = _COLORS_ON if COLOR else _COLORS_OFF
 
 
 # =============================================================================
@@ -98,60 +118,50 @@ if not sys.stdout.isatty():
 class Log:
     """Logging utilities with colored output."""
     
-    @staticmethod
-    def info(msg: str):
-        print(f"{Colors.BBLUE}[INFO]{Colors.RESET} {msg}")
+    # Message templates, built once from the active palette
+    _INFO = f"{C.BBLUE}[INFO]{C.RESET} {{}}"
+    _SUCCESS = f"{C.BGREEN}[OK]{C.RESET} {{}}"
+    _WARNING = f"{C.BYELLOW}[WARN]{C.RESET} {{}}"
+    _ERROR = f"{C.BRED}[ERROR]{C.RESET} {{}}"
+    _RULE = f"{C.BCYAN}{'='*60}{C.RESET}"
+    _STEP = f"\n{_RULE}\n{C.BCYAN}  {{}}{C.RESET}\n{_RULE}\n"
+    _CMD = f"{C.YELLOW}$ {{}}{C.RESET}"
     
-    @staticmethod
-    def success(msg: str):
-        print(f"{Colors.BGREEN}[OK]{Colors.RESET} {msg}")
+    @classmethod
+    def info(cls, msg: str):
+        print(cls._INFO.format(msg))
     
-    @staticmethod
-    def warning(msg: str):
-        print(f"{Colors.BYELLOW}[WARN]{Colors.RESET} {msg}")
+    @classmethod
+    def success(cls, msg: str):
+        print(cls._SUCCESS.format(msg))
     
-    @staticmethod
-    def error(msg: str):
-        print(f"{Colors.BRED}[ERROR]{Colors.RESET} {msg}", file=sys.stderr)
+    @classmethod
+    def warning(cls, msg: str):
+        print(cls._WARNING.format(msg))
     
-    @staticmethod
-    def step(msg: str):
-        print(f"\n{Colors.BCYAN}{'='*60}{Colors.RESET}")
-        print(f"{Colors.BCYAN}  {msg}{Colors.RESET}")
-        print(f"{Colors.BCYAN}{'='*60}{Colors.RESET}\n")
+    @classmethod
+    def error(cls, msg: str):
+        print(cls._ERROR.format(msg), file=sys.stderr)
     
-    @staticmethod
-    def cmd(cmd: str):
-        print(f"{Colors.YELLOW}$ {cmd}{Colors.RESET}")
+    @classmethod
+    def step(cls, msg: str):
+        print(cls._STEP.format(msg))
+    
+    @classmethod
+    def cmd(cls, cmd: str):
+        print(cls._CMD.format(cmd))
 
 
 # =============================================================================
 # BUILD SYSTEM
 # =============================================================================
 
-@dataclass
-class BuildOptions:
-    """Build options parsed from command line."""
-    clean: bool = False
-    rebuild: bool = False
-    configure_only: bool = False
-    build_only: bool = False
-    run: bool = False
-    debug: bool = False
-    release: bool = False
-    toolchain: Optional[str] = None
-    target: str = Config.DEFAULT_TARGET
-    jobs: Optional[int] = None
-    verbose: bool = False
-    graphviz: bool = False
-
-
 class BuildSystem:
     """Main build system class."""
     
-    def __init__(self, project_root: Path, options: BuildOptions):
+    def __init__(self, project_root: Path, options: argparse.Namespace):
         self.root = project_root
-        self.options = options
+        self.options = options  # as parsed by create_parser()
         self.build_dir = self.root / Config.BUILD_DIR
         self.source_dir = self.root / Config.SOURCE_DIR
         self.output_dir = self.root / Config.OUTPUT_DIR
@@ -161,6 +171,40 @@ class BuildSystem:
             self.toolchain = self.root / Config.TOOLCHAIN_DIR / options.toolchain
         else:
             self.toolchain = self.root / Config.TOOLCHAIN_DIR / Config.DEFAULT_TOOLCHAIN
+        
+        # Resolve parallel job count
+        self.jobs = options.jobs or self._default_jobs()
+        
+        # Resolve compiler cache (ccache/sccache)
+        self.compiler_cache = None if options.no_cache else self._find_compiler_cache()
+    
+    @staticmethod
+    def _default_jobs() -> int:
+        """Return the number of CPUs usable by this process."""
+        # sched_getaffinity respects taskset/cgroup limits (Linux only)
+        if hasattr(os, "sched_getaffinity"):
+            return len(os.sched_getaffinity(0)) or 1
+        return os.cpu_count() or 1
+    
+    @staticmethod
+    def _find_compiler_cache() -> Optional[str]:
+        """Return the first compiler cache found on PATH, if any."""
+        for name in Config.COMPILER_CACHES:
+            if shutil.which(name):
+                return name
+        return None
+    
+    def _build_env(self) -> dict:
+        """Return the environment for CMake invocations."""
+        env = os.environ.copy()
+        # Also applies to nested cmake --build calls
+        env["CMAKE_BUILD_PARALLEL_LEVEL"] = str(self.jobs)
+        
+        # Keep the cache under the project root (one path for CI caches)
+        if self.compiler_cache:
+            cache_var = f"{self.compiler_cache.upper()}_DIR"
+            env.setdefault(cache_var, str(self.root / Config.COMPILER_CACHE_DIR))
+        return env
     
     def run_command(self, cmd: List[str], cwd: Optional[Path] = None, 
                     check: bool = True) -> subprocess.CompletedProcess:
@@ -200,8 +244,12 @@ class BuildSystem:
         Log.success("Clean complete")
         return True
     
-    def configure(self) -> bool:
-        """Configure the project with CMake."""
+    def configure(self, force: bool = False) -> bool:
+        """Configure the project with CMake.
+        
+        Skipped when the build tree is configured and nothing that feeds the
+        configure step has changed since, unless force is set.
+        """
         Log.step("Configuring project")
         
         # Create build directory
@@ -217,6 +265,20 @@ class BuildSystem:
                     print(f"  - {f.name}")
             return False
         
+        # Skip if already configured with the same inputs
+        stamp_file = self.build_dir / Config.CONFIGURE_STAMP
+        fingerprint = self._configure_fingerprint()
+        if not force and self._is_configured():
+            try:
+                if stamp_file.read_text() == fingerprint:
+                    Log.success("Configuration up to date")
+                    return True
+            except OSError:
+                pass
+        
+        # Drop the stamp until configure succeeds again
+        stamp_file.unlink(missing_ok=True)
+        
         # Build CMake command
         cmake_cmd = [
             "cmake",
@@ -224,6 +286,25 @@ class BuildSystem:
             f"../{Config.SOURCE_DIR}"
         ]
         
+        # Add generator
+        generator = self._resolve_generator()
+        if generator:
+            cmake_cmd.extend(["-G", generator])
+            if generator == "Ninja":
+                # Serialize memory-heavy link steps, keep compiles parallel
+                cmake_cmd.extend([
+                    "-DCMAKE_JOB_POOLS=link=1",
+                    "-DCMAKE_JOB_POOL_LINK=link",
+                ])
+        
+        # Add compiler launcher (empty value clears a previously cached one).
+        # NASM sources are not cacheable, so only C/C++ are wrapped.
+        launcher = self.compiler_cache or ""
+        cmake_cmd.extend([
+            f"-DCMAKE_C_COMPILER_LAUNCHER={launcher}",
+            f"-DCMAKE_CXX_COMPILER_LAUNCHER={launcher}",
+        ])
+        
         # Add build type
         if self.options.debug:
             cmake_cmd.append("-DCMAKE_BUILD_TYPE=Debug")
@@ -231,6 +312,10 @@ class BuildSystem:
             cmake_cmd.append("-DCMAKE_BUILD_TYPE=Release")
         
         Log.info(f"Toolchain: {self.toolchain.name}")
+        if generator:
+            Log.info(f"Generator: {generator}")
+        if self.compiler_cache:
+            Log.info(f"Compiler cache: {self.compiler_cache}")
         Log.info(f"Source: {self.source_dir}")
         Log.info(f"Build: {self.build_dir}")
         
@@ -240,20 +325,63 @@ class BuildSystem:
             result = subprocess.run(
                 cmake_cmd,
                 cwd=self.build_dir,
+                env=self._build_env(),
                 check=True
             )
+            stamp_file.write_text(fingerprint)
             Log.success("Configuration complete")
             return True
         except subprocess.CalledProcessError as e:
             Log.error("Configuration failed")
             return False
     
-    def build(self) -> bool:
-        """Build the project."""
+    def _configure_fingerprint(self) -> str:
+        """Return a hash of the inputs to the configure step."""
+        # CMake re-runs itself when CMakeLists.txt files change, so only the
+        # inputs passed from here (and the cmake binary itself) matter
+        cmake_path = shutil.which("cmake") or ""
+        cmake_mtime = os.stat(cmake_path).st_mtime_ns if cmake_path else 0
+        
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(self.toolchain.read_bytes())
+        for value in [
+            self.toolchain,
+            self.options.generator,
+            self.compiler_cache,
+            self.options.debug,
+            self.options.release,
+            cmake_path,
+            cmake_mtime,
+        ]:
+            digest.update(f"{value}\0".encode())
+        return digest.hexdigest()
+    
+    def _resolve_generator(self) -> Optional[str]:
+        """Return the CMake generator to request, or None for CMake's choice."""
+        if self.options.generator:
+            return self.options.generator
+        
+        # An existing build tree keeps its generator; CMake rejects a switch
+        if self._is_configured():
+            return None
+        
+        if shutil.which("ninja"):
+            return Config.DEFAULT_GENERATOR
+        return None
+    
+    def _is_configured(self) -> bool:
+        """Return True if CMake has configured the build directory."""
+        return (self.build_dir / "CMakeCache.txt").exists()
+    
+    def build(self, assume_configured: bool = False) -> bool:
+        """Build the project.
+        
+        Configures first if needed, unless the caller has already done so.
+        """
         Log.step(f"Building target: {self.options.target}")
         
         # Check if configured
-        if not (self.build_dir / "Makefile").exists():
+        if not assume_configured and not self._is_configured():
             Log.warning("Project not configured, running configure first...")
             if not self.configure():
                 return False
@@ -262,8 +390,7 @@ class BuildSystem:
         build_cmd = ["cmake", "--build", ".", "--target", self.options.target]
         
         # Add parallel jobs
-        if self.options.jobs:
-            build_cmd.extend(["-j", str(self.options.jobs)])
+        build_cmd.extend(["--parallel", str(self.jobs)])
         
         Log.cmd(" ".join(build_cmd))
         
@@ -271,6 +398,7 @@ class BuildSystem:
             result = subprocess.run(
                 build_cmd,
                 cwd=self.build_dir,
+                env=self._build_env(),
                 check=True
             )
             Log.success("Build complete")
@@ -282,31 +410,50 @@ class BuildSystem:
     
     def _print_outputs(self):
         """Print generated output files."""
-        print(f"\n{Colors.BGREEN}Generated files:{Colors.RESET}")
+        print(f"\n{C.BGREEN}Generated files:{C.RESET}")
         
+        lib_dir = self.output_dir / "lib"
         outputs = [
-            ("Kernel", self.output_dir / "kernel.bin"),
-            ("ISO", self.output_dir / "myOS.iso"),
-            ("SDK Library", self.output_dir / "lib" / "libmyos-sdk.a"),
-            ("Libc Library", self.output_dir / "lib" / "libmyos-libc.a"),
+            ("Kernel", self.output_dir, "kernel.bin"),
+            ("ISO", self.output_dir, "myOS.iso"),
+            ("SDK Library", lib_dir, "libmyos-sdk.a"),
+            ("Libc Library", lib_dir, "libmyos-libc.a"),
         ]
         
-        for name, path in outputs:
-            if path.exists():
-                size = path.stat().st_size
-                size_str = self._format_size(size)
-                print(f"  {Colors.GREEN}✓{Colors.RESET} {name}: {path} ({size_str})")
+        # One directory listing per output directory instead of exists()/stat() per file
+        listings = {path: self._list_files(path) for path in {self.output_dir, lib_dir}}
+        
+        for name, directory, filename in outputs:
+            path = directory / filename
+            entry = listings[directory].get(filename)
+            if entry is not None:
+                size_str = self._format_size(entry.stat().st_size)
+                print(f"  {C.GREEN}✓{C.RESET} {name}: {path} ({size_str})")
             else:
-                print(f"  {Colors.RED}✗{Colors.RESET} {name}: {path} (not found)")
+                print(f"  {C.RED}✗{C.RESET} {name}: {path} (not found)")
+    
+    @staticmethod
+    def _list_files(path: Path) -> dict:
+        """Return {name: os.DirEntry} for the regular files in path."""
+        try:
+            with os.scandir(path) as entries:
+                return {entry.name: entry for entry in entries if entry.is_file()}
+        except OSError:
+            return {}
     
     @staticmethod
     def _format_size(size: int) -> str:
         """Format file size in human-readable format."""
-        for unit in ['B', 'KB', 'MB', 'GB']:
-            if size < 1024:
-                return f"{size:.1f} {unit}"
-            size /= 1024
-        return f"{size:.1f} TB"
+        # Unit index from the bit length: each unit is 2**10 of the previous
+        index = min(max(size.bit_length() - 1, 0) // 10, 4)
+        unit_size = 1 << (10 * index)
+        
+        # Round to one decimal, half to even (same as f"{x:.1f}")
+        tenths, rem = divmod(size * 10, unit_size)
+        if 2 * rem > unit_size or (2 * rem == unit_size and tenths & 1):
+            tenths += 1
+        unit = ['B', 'KB', 'MB', 'GB', 'TB'][index]
+        return f"{tenths // 10}.{tenths % 10} {unit}"
     
     def run_qemu(self) -> bool:
         """Run the OS in QEMU."""
@@ -319,9 +466,40 @@ class BuildSystem:
             return False
         
         qemu_cmd = [Config.QEMU_CMD] + Config.QEMU_ARGS
+        
+        # Reuse a running instance if one is listening on the monitor socket
+        if self.options.qemu_monitor:
+            monitor_path = self.root / Config.QEMU_MONITOR_SOCKET
+            try:
+                if self._reload_qemu(monitor_path, iso_path):
+                    Log.success("Reloaded ISO in running QEMU instance")
+                    return True
+            except OSError as e:
+                # Something is listening but not answering (busy, hung, exiting):
+                # leave its socket alone rather than starting a second instance
+                Log.error(f"QEMU monitor at {monitor_path} did not respond: {e}")
+                return False
+            # Nobody is listening: clear the stale socket before QEMU binds it
+            monitor_path.unlink(missing_ok=True)
+            # Commas in QEMU option values are escaped by doubling them
+            monitor_opt = str(monitor_path).replace(",", ",,")
+            qemu_cmd += ["-monitor", f"unix:{monitor_opt},server,nowait"]
+        
         Log.cmd(" ".join(qemu_cmd))
         Log.info("Press Ctrl+C to stop QEMU")
         
+        # QEMU is the last step: replace this process instead of waiting on it
+        # (POSIX only; on Windows exec spawns a detached child)
+        if not self.options.no_exec and os.name == "posix":
+            sys.stdout.flush()
+            sys.stderr.flush()
+            try:
+                os.chdir(self.root)
+                os.execvp(Config.QEMU_CMD, qemu_cmd)
+            except OSError as e:
+                Log.error(f"Failed to start QEMU: {e}")
+                return False
+        
         try:
             subprocess.run(qemu_cmd, cwd=self.root, check=True)
             return True
@@ -332,11 +510,55 @@ class BuildSystem:
             Log.info("QEMU stopped")
             return True
     
+    @staticmethod
+    def _reload_qemu(monitor_path: Path, iso_path: Path) -> bool:
+        """Swap in the new ISO and reset a running QEMU via its monitor.
+        
+        Returns False if no instance is listening (no socket, or a stale one).
+        Other socket errors (e.g. a timeout from a busy instance) are raised.
+        """
+        if not hasattr(socket, "AF_UNIX") or not monitor_path.exists():
+            return False
+        
+        # The human monitor splits arguments on whitespace unless quoted;
+        # inside quotes it understands backslash escapes
+        quoted_iso = '"' + str(iso_path).replace("\\", "\\\\").replace('"', '\\"') + '"'
+        commands = [
+            f"change {Config.QEMU_CDROM_DEVICE} {quoted_iso}",
+            "system_reset",
+        ]
+        
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(Config.QEMU_MONITOR_TIMEOUT)
+            try:
+                sock.connect(str(monitor_path))
+            except (ConnectionRefusedError, FileNotFoundError):
+                return False
+            
+            # The human monitor prints a "(qemu) " prompt once ready and
+            # again after each command completes
+            BuildSystem._read_monitor_prompt(sock)
+            for command in commands:
+                Log.info(f"QEMU monitor: {command}")
+                sock.sendall(f"{command}\n".encode())
+                BuildSystem._read_monitor_prompt(sock)
+        return True
+    
+    @staticmethod
+    def _read_monitor_prompt(sock: socket.socket):
+        """Read QEMU monitor output up to and including the next prompt."""
+        data = b""
+        while not data.endswith(b"(qemu) "):
+            chunk = sock.recv(4096)
+            if not chunk:
+                raise ConnectionError("QEMU monitor closed the connection")
+            data += chunk
+    
     def generate_graphviz(self) -> bool:
         """Generate dependency graph."""
         Log.step("Generating dependency graph")
         
-        if not (self.build_dir / "Makefile").exists():
+        if not self._is_configured():
             Log.warning("Project not configured, running configure first...")
             if not self.configure():
                 return False
@@ -350,7 +572,8 @@ class BuildSystem:
         Log.cmd(" ".join(graphviz_cmd))
         
         try:
-            subprocess.run(graphviz_cmd, cwd=self.build_dir, check=True)
+            subprocess.run(graphviz_cmd, cwd=self.build_dir,
+                           env=self._build_env(), check=True)
             Log.success(f"Generated: {self.build_dir}/deps.dot")
             
             # Try to convert to PNG if dot is available
@@ -380,7 +603,7 @@ class BuildSystem:
             
             # Configure only
             if self.options.configure_only:
-                return 0 if self.configure() else 1
+                return 0 if self.configure(force=True) else 1
             
             # Build only (assumes already configured)
             if self.options.build_only:
@@ -389,7 +612,7 @@ class BuildSystem:
             # Default: configure + build
             if not self.configure():
                 return 1
-            if not self.build():
+            if not self.build(assume_configured=True):
                 return 1
             
             # Run
@@ -419,9 +642,11 @@ Examples:
   python build.py --clean              Clean build directory
   python build.py --rebuild            Clean, configure, and build
   python build.py --run                Build and run in QEMU
+  python build.py --run --qemu-monitor Reuse a running QEMU (reset + new ISO)
   python build.py --configure-only     Only run CMake configure
   python build.py --graphviz           Generate dependency graph
   python build.py -j8                  Build with 8 parallel jobs
+  python build.py -G "Unix Makefiles"  Use Make instead of Ninja
   python build.py --toolchain i686-elf-cross.cmake
                                        Use cross-compiler toolchain
         """
@@ -454,6 +679,16 @@ Examples:
         action="store_true",
         help="Run the OS in QEMU after building"
     )
+    actions.add_argument(
+        "--qemu-monitor",
+        action="store_true",
+        help="With --run, reload a QEMU started this way instead of starting another"
+    )
+    actions.add_argument(
+        "--no-exec",
+        action="store_true",
+        help="Run QEMU as a child process instead of replacing this one"
+    )
     actions.add_argument(
         "--graphviz",
         action="store_true",
@@ -467,6 +702,11 @@ Examples:
         metavar="FILE",
         help=f"Toolchain file name (default: {Config.DEFAULT_TOOLCHAIN})"
     )
+    build_opts.add_argument(
+        "--generator", "-G",
+        metavar="NAME",
+        help=f"CMake generator (default: {Config.DEFAULT_GENERATOR} if installed)"
+    )
     build_opts.add_argument(
         "--target",
         default=Config.DEFAULT_TARGET,
@@ -476,7 +716,12 @@ Examples:
         "--jobs", "-j",
         type=int,
         metavar="N",
-        help="Number of parallel build jobs"
+        help="Number of parallel build jobs (default: number of CPUs)"
+    )
+    build_opts.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not use ccache/sccache even if installed"
     )
     build_opts.add_argument(
         "--debug", "-d",
@@ -497,28 +742,47 @@ Examples:
     return parser
 
 
-def find_project_root() -> Path:
-    """Find the project root directory."""
+def _subdirs(path: Path) -> set:
+    """Return the names of directories directly under path (one scandir)."""
+    try:
+        with os.scandir(path) as entries:
+            return {entry.name for entry in entries if entry.is_dir()}
+    except OSError:
+        return set()
+
+
+@lru_cache(maxsize=1)
+def _project_root_from(cwd: Path) -> Path:
+    """Find the project root, searching from the script location then cwd."""
     # Start from script location
     script_dir = Path(__file__).resolve().parent
     
-    # Check if script is in project root
-    if (script_dir / "myOS").is_dir() and (script_dir / "cmake").is_dir():
-        return script_dir
-    
-    # Go up to find project root (contains myOS/ and cmake/)
-    for parent in [script_dir.parent, script_dir.parent.parent]:
-        if (parent / "myOS").is_dir() and (parent / "cmake").is_dir():
-            return parent
+    # Check script dir, then go up to find project root (contains myOS/ and cmake/)
+    markers = {Config.SOURCE_DIR, "cmake"}
+    for candidate in [script_dir, script_dir.parent, script_dir.parent.parent]:
+        if markers <= _subdirs(candidate):
+            return candidate
     
     # Fall back to current directory
-    cwd = Path.cwd()
-    if (cwd / "myOS").is_dir():
+    if Config.SOURCE_DIR in _subdirs(cwd):
         return cwd
     
     raise RuntimeError("Could not find project root. Run from project directory.")
 
 
+def find_project_root() -> Path:
+    """Find the project root directory."""
+    # Fast path: explicit root (e.g. set by CI)
+    env_root = os.environ.get("MYOS_PROJECT_ROOT")
+    if env_root:
+        root = Path(env_root).resolve()
+        if not root.is_dir():
+            raise RuntimeError(f"MYOS_PROJECT_ROOT is not a directory: {root}")
+        return root
+    
+    return _project_root_from(Path.cwd())
+
+
 def main() -> int:
     """Main entry point."""
     parser = create_parser()
@@ -526,9 +790,9 @@ def main() -> int:
     
     # Print banner
     print(f"""
-{Colors.BCYAN}╔══════════════════════════════════════════════════════════╗
+{C.BCYAN}╔══════════════════════════════════════════════════════════╗
 ║                    myOS Build System                     ║
-╚══════════════════════════════════════════════════════════╝{Colors.RESET}
+╚══════════════════════════════════════════════════════════╝{C.RESET}
 """)
     
     try:
@@ -538,24 +802,8 @@ def main() -> int:
         Log.error(str(e))
         return 1
     
-    # Create options
-    options = BuildOptions(
-        clean=args.clean,
-        rebuild=args.rebuild,
-        configure_only=args.configure_only,
-        build_only=args.build_only,
-        run=args.run,
-        debug=args.debug,
-        release=args.release,
-        toolchain=args.toolchain,
-        target=args.target,
-        jobs=args.jobs,
-        verbose=args.verbose,
-        graphviz=args.graphviz,
-    )
-    
     # Run build
-    build_system = BuildSystem(project_root, options)
+    build_system = BuildSystem(project_root, args)
     return build_system.execute()
 
 
@@ -20,9 +20,25 @@ Contact: mustafa.alotbah@gmail.com
 
 import os
 import re
+import mmap
 import argparse
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+try:
+    import ahocorasick  # optional: pip install pyahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+# Bytes read up front from each file; files that fill the probe completely
+# are memory-mapped instead of read into memory
+PROBE_SIZE = 64 * 1024
+
+# Minimum files per worker process before a process pool pays off
+MIN_FILES_PER_WORKER = 16
+
 
 def parse_arguments():
     """Parse command-line arguments."""
@@ -70,53 +86,247 @@ def find_files(base_path, extensions=None, exclude_dirs=None):
     if exclude_dirs is None:
         exclude_dirs = ['build', 'bin', '.git', '__pycache__', 'CMakeFiles', '.vscode']
     
+    extensions = tuple(extensions)
+    exclude_dirs = set(exclude_dirs)
+    
+    # When base_path is the root of a git checkout, let git enumerate files
+    # (honors .gitignore); an empty listing is not trusted
+    files = _git_list_files(base_path)
+    if files:
+        return [
+            base_path / rel_path
+            for rel_path in files
+            if rel_path.endswith(extensions)
+            and exclude_dirs.isdisjoint(rel_path.split('/')[:-1])
+        ]
+    
     files = []
     for root, dirs, filenames in os.walk(base_path):
         # Remove excluded directories from traversal
         dirs[:] = [d for d in dirs if d not in exclude_dirs]
         
         for filename in filenames:
-            if any(filename.endswith(ext) for ext in extensions):
+            if filename.endswith(extensions):
                 files.append(Path(root) / filename)
     
     return files
 
 
-def replace_in_file(file_path, replacements, dry_run=False):
+def _git(base_path, *args):
+    """Run a git command in base_path; return its stdout, or None on failure."""
+    try:
+        return subprocess.run(
+            ['git', *args],
+            cwd=base_path,
+            capture_output=True,
+            check=True
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _git_list_files(base_path):
+    """
+    List tracked and untracked-but-not-ignored files with git.
+    
+    Returns:
+        List of '/'-separated paths relative to base_path, or None if
+        base_path is not the top of a git work tree (or git is unavailable)
+    """
+    # A template unpacked inside some other repository (or under a dotfiles
+    # repo in $HOME) may be ignored there entirely; only trust git for its own checkout
+    toplevel = _git(base_path, 'rev-parse', '--show-toplevel')
+    if toplevel is None or Path(os.fsdecode(toplevel.strip())).resolve() != Path(base_path).resolve():
+        return None
+    
+    listed = _git(base_path, 'ls-files', '-z', '--cached', '--others', '--exclude-standard')
+    deleted = _git(base_path, 'ls-files', '-z', '--deleted')
+    if listed is None or deleted is None:
+        return None
+    
+    # Tracked files removed from the working tree are still --cached
+    missing = set(deleted.split(b'\0'))
+    # Deduplicate: unmerged files are listed once per stage
+    names = dict.fromkeys(listed.split(b'\0'))
+    return [os.fsdecode(name) for name in names if name and name not in missing]
+
+
+def encode_replacements(replacements):
+    """
+    Encode a replacements dict for matching on raw file bytes.
+    
+    Args:
+        replacements: Dict of {old_text: new_text}
+    
+    Returns:
+        Tuple of (old_bytes, new_bytes) pairs, in dict order
+    """
+    return tuple((old.encode('utf-8'), new.encode('utf-8'))
+                 for old, new in replacements.items())
+
+
+def compile_replacements(pairs):
+    """
+    Compile replacement pairs into a single-pass matcher.
+    
+    Uses an Aho-Corasick automaton when pyahocorasick is installed, and a
+    regex alternation otherwise. Both replace the leftmost match first and
+    prefer the earliest pair when several start at the same offset.
+    
+    Args:
+        pairs: Tuple of (old_bytes, new_bytes) from encode_replacements()
+    
+    Returns:
+        Function mapping a bytes-like buffer to (new_bytes, substitution_count)
+    """
+    if ahocorasick is not None:
+        return _compile_automaton(pairs)
+    return _compile_regex(pairs)
+
+
+def _compile_regex(pairs):
+    """Build a substitution function from a single regex alternation."""
+    lookup = dict(pairs)
+    pattern = re.compile(b'|'.join(map(re.escape, lookup)))
+    
+    def replace(match):
+        return lookup[match.group(0)]
+    
+    def subn(data):
+        return pattern.subn(replace, data)
+    
+    return subn
+
+
+def _compile_automaton(pairs):
+    """Build a substitution function from an Aho-Corasick automaton."""
+    # latin-1 maps bytes 1:1 to code points, so str offsets equal byte offsets
+    automaton = ahocorasick.Automaton()
+    for idx, (old, new) in enumerate(pairs):
+        key = old.decode('latin-1')
+        automaton.add_word(key, (idx, len(key), new.decode('latin-1')))
+    automaton.make_automaton()
+    
+    def subn(data):
+        text = bytes(data).decode('latin-1')
+        
+        # iter() reports every (possibly overlapping) match by end offset;
+        # order by start offset, then by pair order, and drop overlaps
+        matches = sorted(
+            (end - length + 1, idx, length, new)
+            for end, (idx, length, new) in automaton.iter(text)
+        )
+        
+        parts = []
+        pos = 0
+        for start, _, length, new in matches:
+            if start < pos:
+                continue
+            parts.append(text[pos:start])
+            parts.append(new)
+            pos = start + length
+        if not parts:
+            return data, 0
+        parts.append(text[pos:])
+        return ''.join(parts).encode('latin-1'), len(parts) // 2
+    
+    return subn
+
+
+def replace_in_file(file_path, matcher, needles=None, dry_run=False):
     """
     Replace text in a file.
     
     Args:
         file_path: Path to the file
-        replacements: Dict of {old_text: new_text}
+        matcher: Substitution function from compile_replacements()
+        needles: Optional byte strings; files containing none are skipped
         dry_run: If True, don't actually modify the file
     
     Returns:
         True if changes were made, False otherwise
     """
     try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
+        with open(file_path, 'rb') as f:
+            # A short probe read holds the whole file for most sources, so
+            # needle-free files are skipped without a separate stat or read
+            head = f.read(PROBE_SIZE)
+            if len(head) < PROBE_SIZE:
+                original = head
+                content, count = _substitute(head, matcher, needles)
+            else:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    content, count = _substitute(data, matcher, needles)
+                    original = data[:] if count else None
     except Exception as e:
         print(f"  [WARN] Could not read {file_path}: {e}")
         return False
     
-    original_content = content
+    if count == 0:
+        return False
     
-    for old, new in replacements.items():
-        content = content.replace(old, new)
+    # Rewritten files are normalized to LF line endings; matches that only
+    # replace text with itself (e.g. myos -> myos) don't count as a change
+    content = content.replace(b'\r\n', b'\n')
+    if content == original.replace(b'\r\n', b'\n'):
+        return False
     
-    if content != original_content:
-        if not dry_run:
-            try:
-                with open(file_path, 'w', encoding='utf-8', newline='\n') as f:
-                    f.write(content)
-            except Exception as e:
-                print(f"  [ERROR] Could not write {file_path}: {e}")
-                return False
-        return True
+    if not dry_run:
+        try:
+            Path(file_path).write_bytes(content)
+        except Exception as e:
+            print(f"  [ERROR] Could not write {file_path}: {e}")
+            return False
+    return True
+
+
+def _substitute(data, matcher, needles):
+    """Return (new_content, substitution_count) for a bytes-like buffer."""
+    # Cheap C-level prefilter before running the matcher
+    if needles and not any(data.find(n) != -1 for n in needles):
+        return None, 0
+    return matcher(data)
+
+
+# Per-worker state set by _init_worker: (matcher, needles, dry_run)
+_worker_state = None
+
+
+def _init_worker(pairs, needles, dry_run):
+    """Process pool initializer: compile the matcher once per worker."""
+    global _worker_state
+    _worker_state = (compile_replacements(pairs), needles, dry_run)
+
+
+def _rewrite_one(file_path):
+    """Process pool task: rewrite one file using the worker's matcher."""
+    matcher, needles, dry_run = _worker_state
+    return replace_in_file(file_path, matcher, needles, dry_run)
+
+
+def rewrite_files(files, pairs, needles=None, dry_run=False):
+    """
+    Apply replacements to many files, in parallel when worthwhile.
     
-    return False
+    Args:
+        files: List of file paths
+        pairs: Tuple of (old_bytes, new_bytes) from encode_replacements()
+        needles: Optional byte strings; files containing none are skipped
+        dry_run: If True, don't actually modify the files
+    
+    Returns:
+        List of booleans (True if modified), in the order of files
+    """
+    # Small trees are faster serially than paying process start-up
+    workers = min(os.cpu_count() or 1, len(files) // MIN_FILES_PER_WORKER)
+    if workers <= 1:
+        matcher = compile_replacements(pairs)
+        return [replace_in_file(f, matcher, needles, dry_run) for f in files]
+    
+    # Replacements are shipped once per worker, not with every task
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(pairs, needles, dry_run)) as executor:
+        return list(executor.map(_rewrite_one, files, chunksize=32))
 
 
 def rename_path(old_path, new_path, dry_run=False):
@@ -134,12 +344,23 @@ def rename_path(old_path, new_path, dry_run=False):
     if not os.path.exists(old_path):
         return False
     
-    if os.path.exists(new_path):
+    # Nothing to do when the name doesn't change (e.g. --name myOS)
+    if os.path.abspath(old_path) == os.path.abspath(new_path):
+        return False
+    
+    # On case-insensitive filesystems a case-only rename (myOS -> MyOS)
+    # finds the source itself at the target path; that is not a conflict
+    if os.path.exists(new_path) and not os.path.samefile(old_path, new_path):
         print(f"  [WARN] Target already exists: {new_path}")
         return False
     
     if not dry_run:
-        os.rename(old_path, new_path)
+        # os.replace behaves the same on POSIX and Windows
+        try:
+            os.replace(old_path, new_path)
+        except OSError as e:
+            print(f"  [ERROR] Could not rename {old_path}: {e}")
+            return False
     
     return True
 
@@ -235,6 +456,13 @@ def configure_project(base_path, new_name, author=None, dry_run=False):
         replacements['myOS Project'] = f'{new_name} Project'
         replacements['Mustafa Alotbah'] = author
     
+    # Compiled once per process; every file is scanned in a single pass
+    pairs = encode_replacements(replacements)
+    needles = {old_name, old_name_lower, old_name_upper}
+    if author:
+        needles.add('Mustafa Alotbah')
+    needles = tuple(n.encode('utf-8') for n in needles)
+    
     # Find all files to process
     print("[1/4] Finding files to process...")
     files = find_files(base_path)
@@ -243,8 +471,9 @@ def configure_project(base_path, new_name, author=None, dry_run=False):
     # Process file contents
     print("[2/4] Updating file contents...")
     modified_count = 0
-    for file_path in files:
-        if replace_in_file(file_path, replacements, dry_run):
+    results = rewrite_files(files, pairs, needles, dry_run)
+    for file_path, modified in zip(files, results):
+        if modified:
             rel_path = file_path.relative_to(base_path)
             print(f"      {'[DRY] ' if dry_run else ''}Modified: {rel_path}")
             modified_count += 1
@@ -292,7 +521,8 @@ def configure_project(base_path, new_name, author=None, dry_run=False):
             # Directory checks
             f'("{old_name}")': f'("{new_name}")',
         }
-        if replace_in_file(build_script, build_replacements, dry_run):
+        build_matcher = compile_replacements(encode_replacements(build_replacements))
+        if replace_in_file(build_script, build_matcher, dry_run=dry_run):
             print(f"      {'[DRY] ' if dry_run else ''}Modified: build.py")
     
     # Summary
@@ -25,9 +25,9 @@ namespace myOS {
      */
     struct Glyph {
         uint32_t bitmap[MAX_GLYPH_WIDTH];  ///< Column-based bitmap
-        uint8_t width;                     ///< Glyph width in pixels
+        uint8_t width;                     ///< Glyph width (advance) in pixels
         uint8_t height;                    ///< Glyph height in pixels
-        int8_t offsetX;                    ///< Horizontal offset
+        int8_t offsetX;                    ///< Horizontal offset of bitmap column 0
         int8_t offsetY;                    ///< Vertical offset (for descenders)
     };
 
@@ -84,11 +84,11 @@ namespace myOS {
         int absX = static_cast<int>(positionX_) + cursorX_;
         int absY = static_cast<int>(positionY_) + cursorY_;
 
-        // Render glyph (column-based bitmap)
+        // Render glyph (column-based bitmap, column 0 sits offsetX pixels into the cell)
         for (uint8_t col = 0; col < glyph.width; ++col) {
             for (uint8_t row = 0; row < glyph.height; ++row) {
                 if (glyph.bitmap[col] & (1 << row)) {
-                    int x = absX + col;
+                    int x = absX + glyph.offsetX + col;
                     int y = absY + glyph.offsetY + glyph.height - row;
 
                     if (x >= 0 && x < static_cast<int>(fb_.getWidth()) && y >= 0 && y < static_cast<int>(fb_.getHeight())) {
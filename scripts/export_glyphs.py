@@ -9,6 +9,13 @@ Usage:
     python export_glyphs.py --font ./Poppins-Regular.ttf --size 12
     python export_glyphs.py --font ./Poppins-Regular.ttf --size 12 --range 0x20-0x7E
     python export_glyphs.py --font ./Poppins-Regular.ttf --size 14 --family Poppins --out poppins_14px.txt
+    python export_glyphs.py --font ./Poppins-Regular.ttf --size 12 --binary poppins_12px.bin
+
+Binary format (--binary), all little-endian:
+    header:    char magic[4] = "MYGF"; uint32 count
+    per glyph: uint32 codepoint; uint16 width; uint16 height; uint64 cols[width]
+Columns use the same bit layout as the text output (top row = MSB) and are
+never trimmed, so width is always the advance.
 
 Author: Mustafa Alotbah
 Email: mustafa.alotbah@gmail.com
@@ -19,59 +26,290 @@ Copyright: myOS Project
 
 from pathlib import Path
 from math import ceil
-from typing import Iterable
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Optional
 from PIL import Image, ImageDraw, ImageFont
-import numpy as np
+import PIL
 import argparse
+import hashlib
+import os
+import pickle
+import re
+import struct
 import sys
 
+try:
+    import numpy as np  # optional: pip install numpy (pure-Python packing otherwise)
+except ImportError:
+    np = None
+
+try:
+    from numba import njit  # optional: pip install numba
+except ImportError:
+    njit = None
+
+# "LO-HI" codepoint range; bounds are anything int(x, 0) accepts (0x41, 65, ...)
+RANGE_RE = re.compile(r'\s*(\w+)\s*-\s*(\w+)\s*')
+
+# Most glyphs rendered per strip image (worker chunks are never larger)
+GLYPH_BATCH_SIZE = 256
+
+# Chunks handed to each worker process, so uneven chunks balance out
+CHUNKS_PER_WORKER = 4
+
+# Rendered glyphs are cached per (font file, size) so re-runs only render new codepoints.
+# Bump CACHE_VERSION whenever the rendering/packing output changes.
+CACHE_DIR = Path.home() / ".cache" / "myos-glyphs"
+CACHE_VERSION = 2
+
+# --binary layout (see module docstring)
+GLYPH_BIN_MAGIC = b"MYGF"
+GLYPH_BIN_HEADER = struct.Struct("<4sI")  # magic, glyph count
+GLYPH_BIN_RECORD = struct.Struct("<IHH")  # codepoint, width, height; width uint64 columns follow
+
+# One kernel source line per glyph: family, codepoint, columns, width, height, x offset, codepoint, char
+SETGLYPH_FMT = "\t%s.setGlyph(%#x, {{%s}, %d, %d, %d, 0}); // Glyph %#x - '%s'"
+
 def load_font(font_path: str, px: int) -> ImageFont.FreeTypeFont:
     try:
         return ImageFont.truetype(font_path, px)
     except OSError as e:
         sys.exit(f"Failed to load font '{font_path}': {e}")
 
-def col_to_hex(col_bits: np.ndarray) -> str:
-    # Pack top->bottom into a single integer and return hex string with 0x prefix
-    s = ''.join('1' if int(b) else '0' for b in col_bits.tolist())
-    return hex(int(s or '0', 2))
+if njit is not None:
+    @njit(cache=True)
+    def _pack_cols_u64(ink):
+        # Compiled column packer: one uint64 per column, top row = MSB
+        height, width = ink.shape
+        out = np.zeros(width, np.uint64)
+        for x in range(width):
+            v = np.uint64(0)
+            for y in range(height):
+                v = (v << np.uint64(1)) | np.uint64(ink[y, x])
+            out[x] = v
+        return out
 
-def baseline_aligned_cell(font: ImageFont.FreeTypeFont, ch: str):
-    """Return (bitmap_bits, cell_width, line_height) for ch using baseline alignment."""
-    ascent, descent = font.getmetrics()
-    line_height = ascent + descent
+def pack_columns(ink: "np.ndarray") -> "np.ndarray":
+    # Pack each column of the boolean ink mask top->bottom (top row = MSB)
+    # into a single integer: a uint64 array, or an object array of Python
+    # ints for glyphs taller than 64 rows
+    height = ink.shape[0]
+    if njit is not None and height <= 64:
+        return _pack_cols_u64(ink)
+
+    # ceil(H/8) bytes per column: row k holds pixel rows 8k..8k+7
+    packed = np.packbits(ink, axis=0, bitorder='big')
+    pad = (-height) & 7  # zero bits packbits appends below the last row
+
+    if height <= 64:
+        # Fold the byte rows into one uint64 per column: ceil(H/8) vectorized
+        # shift/or steps across all columns, no per-column Python work
+        cols = np.zeros(packed.shape[1], np.uint64)
+        for byte_row in packed:
+            cols = (cols << np.uint64(8)) | byte_row
+        return cols >> np.uint64(pad)
+
+    # Taller than a machine word: build each column's int from its bytes
+    return np.array([int.from_bytes(col.tobytes(), 'big') >> pad
+                     for col in np.ascontiguousarray(packed.T)], dtype=object)
+
+def pack_columns_py(ink: bytes, width: int, advances: list, offsets: list) -> list:
+    # NumPy-free pack_columns over every glyph cell of a strip. ink holds one
+    # 0/1 byte per pixel, row-major; a column is a strided bytes slice,
+    # folded into an int with plain shifts (top row = MSB)
+    cols = []
+    for advance, off in zip(advances, offsets):
+        for x in range(off, off + advance):
+            v = 0
+            for bit in ink[x::width]:
+                v = (v << 1) | bit
+            cols.append(v)
+    return cols
+
+@lru_cache(maxsize=None)
+def hex_column_list(cols: tuple) -> str:
+    # ", "-joined hex columns. Memoized: many codepoints share one shape
+    # (missing glyphs all render the font's .notdef box, blank glyphs, ...)
+    return ", ".join(map(hex, cols))
+
+def trim_columns(cols: tuple) -> tuple:
+    """Drop blank (all-zero) columns from both ends; return (cols, index of the first kept column)."""
+    left, right = 0, len(cols)
+    while right > left and not cols[right - 1]:
+        right -= 1
+    if left == right:
+        return (), 0  # no ink at all (e.g. space)
+    while not cols[left]:
+        left += 1
+    return cols[left:right], left
+
+def glyph_advance(font: ImageFont.FreeTypeFont, ch: str) -> int:
+    """Return the cell width for ch (at least 1 pixel)."""
     # Prefer typographic advance; fall back to getsize width if Pillow is older
     try:
-        advance = int(ceil(font.getlength(ch)))
+        return max(1, int(ceil(font.getlength(ch))))
     except Exception:
-        advance = max(1, font.getsize(ch)[0])
+        return max(1, font.getsize(ch)[0])
+
+def render_strip(font: ImageFont.FreeTypeFont, chars: list, advances: list,
+                 ascent: int, line_height: int, threshold: Optional[int] = None):
+    """Render chars side by side into one image; return (ink, cell x offsets).
 
-    W = max(1, advance)
-    H = max(1, line_height)
+    ink is a boolean (height, width) array, or without NumPy a bytes object
+    with one 0/1 byte per pixel, row-major.
 
-    # 1-bit image (white background = 1), draw text in black = 0
-    img = Image.new('1', (W, H), 1)
+    With threshold=None glyphs go through FreeType's monochrome rasterizer;
+    otherwise they are rendered antialiased and pixels darker than threshold
+    (0-255) count as ink.
+    """
+    # Leave a gap between cells so ink outside a glyph's advance (side
+    # bearings, overhangs) never lands in a neighbouring cell
+    gap = line_height
+    offsets = []
+    x = gap
+    for advance in advances:
+        offsets.append(x)
+        x += advance + gap
+
+    if threshold is None:
+        # 1-bit image (white background = 1), draw text in black = 0
+        img = Image.new('1', (x, line_height), 1)
+        threshold = 128
+    else:
+        # 8-bit grayscale (white background = 255): FreeType's faster
+        # antialiased path, thresholded below
+        img = Image.new('L', (x, line_height), 255)
     draw = ImageDraw.Draw(img)
-    # anchor "ls": left, baseline. Baseline y = ascent.
-    draw.text((0, ascent), ch, font=font, fill=0, anchor="ls")
-
-    arr = np.array(img)
-    bits = (arr == 0).astype(np.uint8)  # 1 where ink present
-    return bits, W, H
-
-def emit_setglyph_line(family_name: str, u: int, bits: np.ndarray, width: int, height: int) -> str:
-    hex_cols = [col_to_hex(bits[:, x]) for x in range(bits.shape[1])]
-    hexs_str = ", ".join(hex_cols)
-    return (
-        f"\t{family_name}.setGlyph({hex(u)}, "
-        f"{{{{{hexs_str}}}, {width}, {height}, 0, 0}}); "
-        f"// Glyph {hex(u)} - '{chr(u)}'"
-    )
+    for ch, off in zip(chars, offsets):
+        # anchor "ls": left, baseline. Baseline y = ascent.
+        draw.text((off, ascent), ch, font=font, fill=0, anchor="ls")
+
+    # One byte per pixel (1-bit images expand to 0/255 in a single C pass),
+    # wrapped directly, skipping Pillow's __array_interface__ path
+    width, height = img.size
+    pixels = img.tobytes('raw', 'L')
+    if np is None:
+        return pixels.translate(bytes(v < threshold for v in range(256))), offsets
+    # True where ink present
+    ink = np.less(np.frombuffer(pixels, dtype=np.uint8).reshape(height, width), threshold)
+    return ink, offsets
+
+def emit_setglyph_line(family_name: str, u: int, ch: str, cols: tuple, width: int, height: int,
+                       xoff: int = 0) -> str:
+    # Whole line in one %-format call around the memoized column list
+    return SETGLYPH_FMT % (family_name, u, hex_column_list(cols), width, height, xoff, u, ch)
+
+def render_batch(font: ImageFont.FreeTypeFont, cps: list, threshold: Optional[int] = None) -> list:
+    """Render a batch of codepoints and return (u, (cols tuple, width, height)) pairs."""
+    # Font metrics are the same for every glyph
+    ascent, descent = font.getmetrics()
+    line_height = max(1, ascent + descent)
+    chars = [chr(u) for u in cps]
+    advances = [glyph_advance(font, ch) for ch in chars]
+
+    # One render per batch; each glyph is a column slice of the strip
+    ink, offsets = render_strip(font, chars, advances, ascent, line_height, threshold)
+
+    if np is None:
+        cols = tuple(pack_columns_py(ink, len(ink) // line_height, advances, offsets))
+    else:
+        # Gather every glyph's columns (gaps dropped) into one contiguous mask
+        # and pack it in a single call; convert to Python ints once, not per glyph
+        widths = np.asarray(advances)
+        starts = np.cumsum(widths) - widths
+        col_index = np.arange(widths.sum()) + np.repeat(np.asarray(offsets) - starts, widths)
+        cols = tuple(pack_columns(ink[:, col_index]).tolist())
+
+    glyphs = []
+    start = 0
+    for u, advance in zip(cps, advances):
+        glyphs.append((u, (cols[start:start + advance], advance, line_height)))
+        start += advance
+    return glyphs
+
+# Per-worker state set by _init_worker: (font, threshold)
+_worker_state = None
+
+def _init_worker(font_path: str, px: int, threshold: Optional[int]) -> None:
+    """Process pool initializer: load the font once per worker."""
+    global _worker_state
+    # Open the font here, not in the parent: FreeTypeFont objects are not always fork-safe
+    _worker_state = (load_font(font_path, px), threshold)
+
+def _render_chunk(cps: list) -> list:
+    """Process pool task: render one chunk of codepoints with the worker's font."""
+    font, threshold = _worker_state
+    return render_batch(font, cps, threshold)
+
+def emit_all(family_name: str, glyphs: dict, cps: Iterable[int], trim: bool = False) -> Iterable[str]:
+    """Yield the setGlyph lines for cps, newline-separated (no trailing newline).
+
+    With trim=True blank edge columns are left out and the first kept column's
+    index goes into the glyph's x offset; width stays the full advance.
+    """
+    sep = ""
+    for u in cps:
+        cols, width, height = glyphs[u]
+        xoff = 0
+        if trim:
+            cols, xoff = trim_columns(cols)
+        yield sep + emit_setglyph_line(family_name, u, chr(u), cols, width, height, xoff)
+        sep = "\n"
+
+def write_binary(path: Path, glyphs: dict, cps: list) -> None:
+    """Write the glyphs for cps in the --binary format."""
+    with open(path, "wb", buffering=1 << 20) as f:
+        f.write(GLYPH_BIN_HEADER.pack(GLYPH_BIN_MAGIC, len(cps)))
+        for u in cps:
+            cols, width, height = glyphs[u]
+            f.write(GLYPH_BIN_RECORD.pack(u, width, height))
+            f.write(struct.pack(f"<{width}Q", *cols))
+
+def cache_path(font_path: str, px: int, threshold: Optional[int] = None) -> Path:
+    """Return the glyph cache file for this font file's contents at this size."""
+    # Monochrome rendering is keyed as threshold 0xFFFF (thresholds are 0-255)
+    mode = 0xFFFF if threshold is None else threshold
+    # A Pillow or FreeType upgrade can rasterize the same font differently
+    rasterizer = f"{PIL.__version__}/{ImageFont.core.freetype2_version}".encode()
+    key = hashlib.sha1(
+        Path(font_path).read_bytes() + px.to_bytes(2, 'big') + mode.to_bytes(2, 'big')
+        + CACHE_VERSION.to_bytes(2, 'big') + rasterizer
+    ).hexdigest()
+    return CACHE_DIR / f"{key}.pkl"
+
+def load_cache(path: Path) -> dict:
+    """Return the cached {codepoint: (cols tuple, width, height)} dict ({} if missing or unreadable)."""
+    try:
+        with open(path, "rb") as f:
+            cache = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+def save_cache(path: Path, cache: dict) -> None:
+    """Write the glyph cache atomically; a cache we can't write is not an error."""
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp, "wb") as f:
+            pickle.dump(cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"Warning: could not write glyph cache {path}: {e}", file=sys.stderr)
+        tmp.unlink(missing_ok=True)
 
 def default_codepoints() -> Iterable[int]:
     # Printable ASCII (space excluded because many monospace fonts treat it as zero-ink)
     return range(0x21, 0x7F)
 
+def parse_range(spec: str) -> list:
+    """Parse a codepoint selection like '0x21-0x7E' or '0x20,0x41,0x7E' (inclusive)."""
+    m = RANGE_RE.fullmatch(spec)
+    if m:
+        return list(range(int(m.group(1), 0), int(m.group(2), 0) + 1))
+    return [int(tok, 0) for tok in spec.split(",") if tok.strip()]
+
 def sanitize_family(font_path: str) -> str:
     base = Path(font_path).stem
     # Make it a valid-ish identifier for the target code
@@ -84,31 +322,72 @@ def main():
     ap.add_argument("--range", default="0x21-0x7E", help="Codepoint range like 0x21-0x7E or CSV (e.g., 0x20,0x41,0x7E)")
     ap.add_argument("--family", default=None, help="Family name to print (default: derived from font file name)")
     ap.add_argument("--out", default=None, help="Output file (default: <font>_glyphs_<size>px.txt)")
+    ap.add_argument("--binary", default=None, metavar="OUT.bin",
+                    help="Also write the glyphs as packed binary (uint64 columns, glyphs up to 64px tall)")
+    ap.add_argument("--threshold", type=int, default=None, metavar="LEVEL",
+                    help="Render antialiased and keep pixels darker than LEVEL (1-255) "
+                         "(default: FreeType monochrome rasterizer)")
+    ap.add_argument("--trim", action="store_true",
+                    help="Omit blank edge columns and store the left one as the glyph x offset")
+    ap.add_argument("--no-cache", action="store_true", help=f"Render every glyph, ignoring the cache in {CACHE_DIR}")
     args = ap.parse_args()
 
+    # Parse codepoint selection
+    try:
+        cps = parse_range(args.range)
+    except ValueError as e:
+        ap.error(f"invalid --range '{args.range}': {e}")
+    if args.threshold is not None and not 1 <= args.threshold <= 255:
+        ap.error(f"--threshold must be between 1 and 255, got {args.threshold}")
+
     font = load_font(args.font, args.size)
     family = args.family or sanitize_family(args.font)
 
-    # Parse codepoint selection
-    cps: Iterable[int]
-    if "-" in args.range and args.range.count("-") == 1 and "," not in args.range:
-        lo_str, hi_str = args.range.split("-")
-        cps = range(int(lo_str, 0), int(hi_str, 0) + 1)
+    if args.binary:
+        ascent, descent = font.getmetrics()
+        if ascent + descent > 64:
+            ap.error(f"--binary stores each column as a uint64, but glyphs at --size {args.size} "
+                     f"are {ascent + descent} pixels tall")
+
+    cache_file = None if args.no_cache else cache_path(args.font, args.size, args.threshold)
+    glyphs = load_cache(cache_file) if cache_file else {}
+
+    # Only render codepoints the cache doesn't have; sorted so each strip
+    # covers a contiguous run of the font
+    missing = sorted(set(cps).difference(glyphs))
+    # Leave one core for this process, which collects the results; a single
+    # strip's worth of glyphs is rendered here
+    workers = min(ceil(len(missing) / GLYPH_BATCH_SIZE), (os.cpu_count() or 1) - 1)
+
+    if workers > 1:
+        size = min(GLYPH_BATCH_SIZE, ceil(len(missing) / (workers * CHUNKS_PER_WORKER)))
+        chunks = [missing[i:i + size] for i in range(0, len(missing), size)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(args.font, args.size, args.threshold)) as executor:
+            for rendered in executor.map(_render_chunk, chunks):
+                glyphs.update(rendered)
     else:
-        cps = [int(tok, 0) for tok in args.range.split(",") if tok.strip()]
+        for i in range(0, len(missing), GLYPH_BATCH_SIZE):
+            glyphs.update(render_batch(font, missing[i:i + GLYPH_BATCH_SIZE], args.threshold))
 
-    lines = []
-    for u in cps:
-        bits, w, h = baseline_aligned_cell(font, chr(u))
-        lines.append(emit_setglyph_line(family, u, bits, w, h))
+    if cache_file and missing:
+        save_cache(cache_file, glyphs)
 
     out_path = (
         Path(args.out)
         if args.out
         else Path(f"{sanitize_family(args.font)}_glyphs_{args.size}px.txt")
     )
-    out_path.write_text("\n".join(lines), encoding="utf-8")
-    print(f"Wrote {out_path} ({len(lines)} glyphs)")
+
+    # Stream lines into one large write buffer instead of joining a list
+    with open(out_path, "w", encoding="utf-8", buffering=1 << 20) as f:
+        f.writelines(emit_all(family, glyphs, cps, args.trim))
+
+    print(f"Wrote {out_path} ({len(cps)} glyphs)")
+
+    if args.binary:
+        write_binary(Path(args.binary), glyphs, cps)
+        print(f"Wrote {args.binary} ({len(cps)} glyphs)")
 
 if __name__ == "__main__":
     main()